@@ -4,38 +4,13 @@ import joblib
 import os
 import tempfile
 
+from predictor.schema import SCHEMA, GENDER_ENCODING
 
 
 st.set_page_config(page_title="Stress-type Predictor", layout="wide")
 
-# ---------- Feature list (use the exact column names used during training) ----------
-FEATURES = [
-    "Gender",
-    "Age",
-    "Have you recently experienced stress in your life?",
-    "Have you noticed a rapid heartbeat or palpitations?",
-    "Are you finding difficulty to concentrate in studies?",
-    "Do you face any sleep problems or difficulties falling asleep?",
-    "Have you been dealing with anxiety or tension recently?.1",
-    "Have you been getting headaches more often than usual?",
-    "Do you get irritated easily?",
-    "Do you have trouble concentrating on your academic tasks?",
-    "Have you been feeling sadness or low mood?",
-    "Have you been experiencing any illness or health issues?",
-    "Do you often feel lonely or isolated?",
-    "Do you feel overwhelmed with your academic workload?",
-    "Are you in competition with your peers, and does it affect you?",
-    "Do you find that your relationship often causes you stress?",
-    "Are you facing any difficulties with your professors or instructors?",
-    "Is your working environment unpleasant or stressful?",
-    "Do you struggle to find time for relaxation and leisure activities?",
-    "Is your hostel or home environment causing you difficulties?",
-    "Do you lack confidence in your academic performance?",
-    "Do you lack confidence in your choice of academic subjects?",
-    "Academic and extracurricular activities conflicting for you?",
-    "Do you attend classes regularly?",
-    "Have you gained/lost weight?"
-]
+# ---------- Feature list (shared with the Django app; see predictor/schema.py) ----------
+FEATURES = SCHEMA.columns
 
 CLASS_MAP = {
     0: "Distress (Negative Stress)",
@@ -44,7 +19,7 @@ CLASS_MAP = {
 }
 
 st.title("Know Your Stress")
-st.caption("Answer each survey question (except Age and Gender) in a scale of 0–5. Gender as Male/Female. Age is numeric.")
+st.caption("Answer each survey question (except Age and Gender) in a scale of 1–5. Gender as Male/Female. Age is numeric.")
 
 # --- Model loader (local or upload) ---
 #uploaded = st.file_uploader("Upload model file (joblib) — optional", type=["joblib", "pkl"])
@@ -63,12 +38,10 @@ else:
     st.warning("No model found. Upload a joblib file or put `model.joblib` in this folder.")
     st.stop()
 
-# Determine expected columns
-if hasattr(model, "feature_names_in_"):
-    expected_cols = list(model.feature_names_in_)
-else:
-    expected_cols = FEATURES
-    st.info("Model does not expose feature_names_in_. Using the FEATURES list defined in this app — ensure it matches training exactly.")
+# The model must have been trained on the schema's columns, in the schema's order
+if hasattr(model, "feature_names_in_") and list(model.feature_names_in_) != FEATURES:
+    st.error("Model columns do not match predictor/schema.py. Retrain the model or update the schema.")
+    st.stop()
 
 # --- Input form ---
 with st.form("input_form"):
@@ -76,40 +49,32 @@ with st.form("input_form"):
     with c1:
         gender = st.radio("Gender", options=["Male", "Female"], index=0)
     with c2:
-        age = st.number_input("Age (years)", min_value=10, max_value=120, value=20, step=1)
+        age_spec = SCHEMA.spec('age')
+        age = st.number_input("Age (years)", min_value=int(age_spec.low), max_value=int(age_spec.high),
+                              value=int(age_spec.default), step=1)
 
-    # Map gender (adjust if your training used different encoding)
-    gender_map = {"Male": 0, "Female": 1}
-
-    # Survey questions (0-5 scale). We'll create sliders for each.
-    question_cols = expected_cols[2:] if len(expected_cols) >= 3 else FEATURES[2:]
+    # Survey questions (1-5 scale). We'll create sliders for each.
     # lay out sliders in two columns for compactness
     cols = st.columns(2)
     slider_values = {}
-    for i, q in enumerate(question_cols):
+    for i, spec in enumerate(SCHEMA.questions):
         with cols[i % 2]:
-            # integer slider 0-5
-            slider_values[q] = st.slider(q, min_value=0, max_value=5, value=0, step=1, key=f"s_{i}")
+            slider_values[spec.name] = st.slider(spec.label, min_value=int(spec.low), max_value=int(spec.high),
+                                                 value=int(spec.default), step=1, key=f"s_{i}")
 
     submit = st.form_submit_button("Predict")
 
 if submit:
-    # build input dict
-    input_dict = {}
-    input_dict["Gender"] = int(gender_map.get(gender, 0))
-    input_dict["Age"] = int(age)
-
-    for q, val in slider_values.items():
-        input_dict[q] = int(val)
-
-    # Check missing columns
-    missing = [c for c in expected_cols if c not in input_dict]
-    if missing:
-        st.error("Missing features expected by the model: " + ", ".join(missing))
+    # build input row in schema order
+    input_dict = {"gender": GENDER_ENCODING[gender], "age": age, **slider_values}
+    try:
+        row = SCHEMA.parse_dict(input_dict)
+    except ValueError as e:
+        st.error(f"Invalid input: {e}")
         st.stop()
 
     # Create DataFrame in exact order
-    input_df = pd.DataFrame([input_dict], columns=expected_cols)
+    input_df = pd.DataFrame(row, columns=FEATURES)
     st.subheader("Inputs (sent to model)")
     st.write(input_df.T)
 
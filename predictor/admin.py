@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ScoringJob
+
+
+@admin.register(ScoringJob)
+class ScoringJobAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'status', 'owner', 'rows_done', 'rows_total', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('id', 'created_at', 'updated_at')
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class PredictorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'predictor'
+
+    def ready(self):
+        # resume queued/orphaned cohort jobs on the first request after a restart,
+        # not only when someone opens the cohort page
+        from django.core.signals import request_started
+        from . import jobs
+        request_started.connect(jobs.start_on_first_request,
+                                dispatch_uid='predictor.jobs.start_on_first_request')
@@ -0,0 +1,150 @@
+# explain.py - per-prediction feature attributions
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .schema import SCHEMA
+
+
+def _default_background(model, n_features: int) -> np.ndarray:
+    """
+    Reference values a feature is "switched off" to.
+    Uses the training means stored in the pipeline's scaler when available,
+    otherwise the middle of each answer scale.
+    """
+    steps = getattr(model, 'steps', None) or []
+    for _, step in steps:
+        mean = getattr(step, 'mean_', None)
+        if mean is not None and len(mean) == n_features:
+            return np.asarray(mean, dtype=float).reshape(1, -1)
+    fallback = (SCHEMA.low + SCHEMA.high) / 2
+    fallback[1] = SCHEMA.defaults[1]  # age: typical student rather than mid-range
+    return fallback.reshape(1, -1)
+
+
+class FeatureExplainer:
+    """
+    Occlusion-style attributions for the stress classifier.
+
+    For every survey, each of the 25 features is replaced in turn by the
+    background value(s) and the drop in the predicted class's score is its
+    contribution. All perturbed rows for all surveys in a call are scored
+    with a single vectorized model call, and results are cached per input
+    vector so repeated surveys cost nothing.
+    """
+
+    def __init__(self, model, background=None, feature_names=None, labels=None, cache_size: int = 1024):
+        self.model = model
+        self.feature_names = list(feature_names or SCHEMA.names)
+        n_features = len(self.feature_names)
+        if background is None:
+            background = _default_background(model, n_features)
+        self.background = np.atleast_2d(np.asarray(background, dtype=float))
+        if self.background.shape[1] != n_features:
+            raise ValueError(f"Background must have {n_features} columns, got {self.background.shape[1]}")
+        self.labels = labels if labels is not None else SCHEMA.labels
+        # encoded features (gender) are shown as their original answer, not the code
+        self._decoders = {
+            spec.name: {code: answer for answer, code in spec.encoding.items()}
+            for spec in SCHEMA if spec.encoding
+        }
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _score(self, rows: np.ndarray) -> np.ndarray:
+        # SVC without probability=True only exposes decision_function
+        if hasattr(self.model, 'predict_proba'):
+            try:
+                return self.model.predict_proba(rows)
+            except Exception:
+                pass
+        scores = self.model.decision_function(rows)
+        return scores.reshape(len(rows), -1)
+
+    def _attribute(self, X: np.ndarray):
+        """Returns (predicted class indices, contributions) for the rows of X."""
+        n, d = X.shape
+        bg = self.background
+        b = len(bg)
+
+        # perturbed[i, j, k] = X[i] with feature j replaced by background row k
+        perturbed = np.broadcast_to(X[:, None, None, :], (n, d, b, d)).copy()
+        idx = np.arange(d)
+        perturbed[:, idx, :, idx] = bg.T[:, None, :]
+
+        scores = self._score(np.vstack([X, perturbed.reshape(-1, d)]))
+        base = scores[:n]
+        occluded = scores[n:].reshape(n, d, b, -1).mean(axis=2)
+
+        predicted = base.argmax(axis=1)
+        rows = np.arange(n)
+        contributions = base[rows, predicted][:, None] - occluded[rows, :, predicted]
+        return predicted, contributions
+
+    def explain(self, X, top_k: int = 5) -> list:
+        """
+        Explain one survey (1-D) or many surveys (2-D) in feature order.
+        Returns a list with, per survey, the top_k features pushing the model
+        towards its predicted class, strongest first.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} features, got {X.shape[1]}")
+
+        keys = [row.tobytes() for row in X]
+        results = [None] * len(X)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                hit = self._cache.get(key)
+                if hit is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = hit
+                else:
+                    missing.append(i)
+
+        if missing:
+            # de-duplicate so identical surveys in one batch are scored once
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            position = {key: pos for pos, key in enumerate(unique)}
+            first_row = {}
+            for i in missing:
+                first_row.setdefault(keys[i], i)
+            predicted, contributions = self._attribute(X[[first_row[key] for key in unique]])
+            with self._lock:
+                for key, pos in position.items():
+                    self._cache[key] = (int(predicted[pos]), contributions[pos])
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for i in missing:
+                pos = position[keys[i]]
+                results[i] = (int(predicted[pos]), contributions[pos])
+
+        return [self._top_features(X[i], results[i][1], top_k) for i in range(len(X))]
+
+    def _top_features(self, row: np.ndarray, contributions: np.ndarray, top_k: int) -> list:
+        order = np.argsort(-contributions)
+        top = []
+        for j in order[:top_k]:
+            if contributions[j] <= 0:
+                break
+            name = self.feature_names[j]
+            value = float(row[j])
+            decoder = self._decoders.get(name)
+            answer = decoder.get(value, f"{value:g}") if decoder else f"{value:g}"
+            top.append({
+                'feature': name,
+                'question': self.labels.get(name, name),
+                'value': value,
+                'answer': answer,
+                'contribution': float(contributions[j]),
+            })
+        return top
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
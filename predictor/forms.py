@@ -1,37 +1,39 @@
 from django import forms
+from django.conf import settings
+
+from .schema import SCHEMA, GENDER_ENCODING
 
 SCALE_1_5 = [(i, str(i)) for i in range(1, 6)]
 
-GENDER_CHOICES = [
-    (0, 'Male'),
-    (1, 'Female'),
-]
+GENDER_CHOICES = [(int(code), name) for name, code in GENDER_ENCODING.items()]
+
+
+def _form_field(spec):
+    if spec.encoding is not None:
+        return forms.TypedChoiceField(label=spec.label, choices=GENDER_CHOICES, coerce=int)
+    if spec in SCHEMA.questions:
+        # 1-5 scale (1 lowest, 5 highest)
+        return forms.TypedChoiceField(label=f'{spec.label} (1-5)', choices=SCALE_1_5, coerce=int)
+    return forms.IntegerField(label=spec.label, min_value=int(spec.low), max_value=int(spec.high),
+                              initial=int(spec.default))
+
 
 class StressForm(forms.Form):
-    gender = forms.TypedChoiceField(label='Gender', choices=GENDER_CHOICES, coerce=int)
-    age = forms.IntegerField(label='Age', min_value=10, max_value=100, initial=20)
-
-    # all following fields are 1-5 scale (1 lowest, 5 highest)
-    stress_recent = forms.TypedChoiceField(label='Have you recently experienced stress in your life? (1-5)', choices=SCALE_1_5, coerce=int)
-    rapid_heartbeat = forms.TypedChoiceField(label='Have you noticed a rapid heartbeat or palpitations? (1-5)', choices=SCALE_1_5, coerce=int)
-    anxiety = forms.TypedChoiceField(label='Have you been dealing with anxiety or tension recently? (1-5)', choices=SCALE_1_5, coerce=int)
-    sleep_problems = forms.TypedChoiceField(label='Do you face any sleep problems or difficulties falling asleep? (1-5)', choices=SCALE_1_5, coerce=int)
-    difficulty_concentrate = forms.TypedChoiceField(label='Are you finding difficulty to concentrate? (1-5)', choices=SCALE_1_5, coerce=int)
-    headaches = forms.TypedChoiceField(label='Have you been getting headaches more often than usual? (1-5)', choices=SCALE_1_5, coerce=int)
-    irritated = forms.TypedChoiceField(label='Do you get irritated easily? (1-5)', choices=SCALE_1_5, coerce=int)
-    trouble_academic_concentration = forms.TypedChoiceField(label='Do you have trouble concentrating on your academic tasks? (1-5)', choices=SCALE_1_5, coerce=int)
-    sadness_low_mood = forms.TypedChoiceField(label='Have you been feeling sadness or low mood? (1-5)', choices=SCALE_1_5, coerce=int)
-    illness_health_issues = forms.TypedChoiceField(label='Have you been experiencing any illness or health issues? (1-5)', choices=SCALE_1_5, coerce=int)
-    lonely_isolated = forms.TypedChoiceField(label='Do you often feel lonely or isolated? (1-5)', choices=SCALE_1_5, coerce=int)
-    overwhelmed_workload = forms.TypedChoiceField(label='Do you feel overwhelmed with your academic workload? (1-5)', choices=SCALE_1_5, coerce=int)
-    competition_peers = forms.TypedChoiceField(label='Are you in competition with your peers, and does it affect you? (1-5)', choices=SCALE_1_5, coerce=int)
-    relationship_stress = forms.TypedChoiceField(label='Do you find that your relationship often causes you stress? (1-5)', choices=SCALE_1_5, coerce=int)
-    difficulties_with_professors = forms.TypedChoiceField(label='Are you facing any difficulties with your professors or instructors? (1-5)', choices=SCALE_1_5, coerce=int)
-    unpleasant_work_environment = forms.TypedChoiceField(label='Is your working environment unpleasant or stressful? (1-5)', choices=SCALE_1_5, coerce=int)
-    no_time_relaxation = forms.TypedChoiceField(label='Do you struggle to find time for relaxation and leisure activities? (1-5)', choices=SCALE_1_5, coerce=int)
-    hostel_home_difficulties = forms.TypedChoiceField(label='Is your hostel or home environment causing you difficulties? (1-5)', choices=SCALE_1_5, coerce=int)
-    lack_confidence_performance = forms.TypedChoiceField(label='Do you lack confidence in your academic performance? (1-5)', choices=SCALE_1_5, coerce=int)
-    lack_confidence_subject_choice = forms.TypedChoiceField(label='Do you lack confidence in your choice of academic subjects? (1-5)', choices=SCALE_1_5, coerce=int)
-    conflict_academic_extracurricular = forms.TypedChoiceField(label='Academic and extracurricular activities conflicting for you? (1-5)', choices=SCALE_1_5, coerce=int)
-    attend_classes_regularly = forms.TypedChoiceField(label='Do you attend classes regularly? (1-5)', choices=SCALE_1_5, coerce=int)
-    gained_lost_weight = forms.TypedChoiceField(label='Have you gained/lost weight? (1-5)', choices=SCALE_1_5, coerce=int)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # fields come from the shared schema so their names and order match the model
+        for spec in SCHEMA:
+            self.fields[spec.name] = _form_field(spec)
+
+
+class CohortUploadForm(forms.Form):
+    file = forms.FileField(label='Survey export (CSV)')
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith('.csv'):
+            raise forms.ValidationError('Please upload a .csv file.')
+        max_mb = getattr(settings, 'COHORT_MAX_UPLOAD_MB', 20)
+        if upload.size > max_mb * 1024 * 1024:
+            raise forms.ValidationError(f'File is larger than {max_mb} MB.')
+        return upload
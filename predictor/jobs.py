@@ -0,0 +1,245 @@
+# jobs.py - background cohort scoring (upload -> chunked scoring -> download)
+
+import os
+import socket
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import joblib
+import pandas as pd
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .models import ScoringJob
+from .schema import SCHEMA
+
+MODEL_PATH = os.path.join(settings.BASE_DIR, 'predictor', 'ml_model', 'trained_model.joblib')
+
+CLASS_LABELS = {
+    0: 'Distress (Negative Stress)',
+    1: 'Eustress (Positive Stress)',
+    2: 'No Stress',
+}
+
+# A RUNNING job whose owner can't be checked (another host) is assumed lost
+# once its heartbeat (updated_at, refreshed every chunk) is this old.
+STALE_AFTER = timedelta(minutes=5)
+
+HOSTNAME = socket.gethostname()
+
+_model = None
+_executor = None
+_lock = threading.Lock()
+# keyed by str(pk): callers pass UUIDs or their string form
+_submitted = set()   # job ids handed to this process's pool
+_active = set()      # job ids currently being scored in this process
+
+
+def jobs_dir() -> str:
+    return str(getattr(settings, 'COHORT_JOBS_DIR', os.path.join(settings.BASE_DIR, 'cohort_jobs')))
+
+
+def get_model():
+    """Jobs keep their own handle on the artifact so workers don't need the view module."""
+    global _model
+    with _lock:
+        if _model is None:
+            _model = joblib.load(MODEL_PATH)
+        return _model
+
+
+def create_job(uploaded_file) -> ScoringJob:
+    """Store the upload on disk (streamed in chunks) and record a queued job."""
+    job = ScoringJob(original_name=os.path.basename(uploaded_file.name)[:255])
+    job_dir = os.path.join(jobs_dir(), str(job.id))
+    os.makedirs(job_dir, exist_ok=True)
+    job.input_path = os.path.join(job_dir, 'input.csv')
+    with open(job.input_path, 'wb') as f:
+        for chunk in uploaded_file.chunks():
+            f.write(chunk)
+    job.save()
+    return job
+
+
+def current_owner() -> str:
+    return f"{HOSTNAME}:{os.getpid()}"
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_orphaned(job: ScoringJob, now=None) -> bool:
+    """True if a RUNNING job's worker is gone and the job will never finish on its own."""
+    if job.status != ScoringJob.RUNNING:
+        return False
+    host, _, pid = job.owner.rpartition(':')
+    if not host or not pid.isdigit():
+        return True
+    if host == HOSTNAME:
+        if int(pid) == os.getpid():
+            return str(job.pk) not in _active
+        if not _pid_alive(int(pid)):
+            return True
+    # owner elsewhere (or a live local process): trust it until the heartbeat goes stale
+    return job.updated_at < (now or timezone.now()) - STALE_AFTER
+
+
+def in_process() -> bool:
+    return getattr(settings, 'COHORT_JOB_BROKER', 'inprocess') == 'inprocess'
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'COHORT_JOB_WORKERS', 1),
+                thread_name_prefix='cohort-job',
+            )
+        return _executor
+
+
+def _submit(pk):
+    with _lock:
+        if str(pk) in _submitted:
+            return
+        _submitted.add(str(pk))
+    _get_executor().submit(run_job, pk)
+
+
+def ensure_started():
+    """Recover unfinished jobs into this process's pool if the in-process broker is configured."""
+    if in_process():
+        for pk in recover_jobs():
+            _submit(pk)
+
+
+def start_on_first_request(sender, **kwargs):
+    """request_started receiver: resume queued/orphaned jobs as soon as a restarted server sees traffic."""
+    from django.core.signals import request_started
+    request_started.disconnect(dispatch_uid='predictor.jobs.start_on_first_request')
+    try:
+        ensure_started()
+    except DatabaseError as e:
+        print(f"Cohort job recovery skipped: {e}")
+
+
+def enqueue(job: ScoringJob):
+    """
+    With the in-process broker the job goes straight to the worker pool.
+    With the 'db' broker it stays QUEUED in the database until a
+    `run_cohort_worker` process claims it.
+    """
+    if in_process():
+        _submit(job.pk)
+
+
+def check_job(job: ScoringJob) -> ScoringJob:
+    """
+    Called whenever a job's status is read: re-queue it if its worker died,
+    and make sure a queued job is actually in some worker pool.
+    """
+    if is_orphaned(job):
+        _requeue(job.pk)
+        job.refresh_from_db()
+    if job.status == ScoringJob.QUEUED and in_process():
+        _submit(job.pk)
+    return job
+
+
+def _requeue(pk):
+    ScoringJob.objects.filter(pk=pk, status=ScoringJob.RUNNING).update(
+        status=ScoringJob.QUEUED, owner='', rows_done=0, updated_at=timezone.now())
+
+
+def recover_jobs() -> list:
+    """Re-queue RUNNING jobs whose worker is gone; return ids of every queued job."""
+    now = timezone.now()
+    for job in ScoringJob.objects.filter(status=ScoringJob.RUNNING):
+        if is_orphaned(job, now):
+            _requeue(job.pk)
+    return list(ScoringJob.objects.filter(status=ScoringJob.QUEUED).values_list('pk', flat=True))
+
+
+def _claim(pk) -> bool:
+    # atomic QUEUED -> RUNNING so two workers never score the same job
+    return ScoringJob.objects.filter(pk=pk, status=ScoringJob.QUEUED).update(
+        status=ScoringJob.RUNNING, owner=current_owner(), rows_done=0, error='',
+        updated_at=timezone.now()) == 1
+
+
+def _count_rows(path: str) -> int:
+    with open(path, 'rb') as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def run_job(pk):
+    """Score one job's file chunk by chunk, recording progress after every chunk."""
+    key = str(pk)
+    with _lock:
+        _submitted.discard(key)
+        if key in _active:
+            return  # another thread of this process is already scoring it
+        # mark active before claiming so is_orphaned never sees our own claim as abandoned
+        _active.add(key)
+    owner = current_owner()
+    # every write after the claim is conditional on still owning the job, so a
+    # worker whose job was re-queued and re-claimed can't overwrite the new run
+    mine = ScoringJob.objects.filter(pk=pk, status=ScoringJob.RUNNING, owner=owner)
+    tmp_path = None
+    try:
+        if not _claim(pk):
+            return
+        job = ScoringJob.objects.get(pk=pk)
+        model = get_model()
+        mine.update(rows_total=_count_rows(job.input_path))
+
+        result_path = os.path.join(os.path.dirname(job.input_path), 'scored.csv')
+        tmp_path = f"{result_path}.{os.getpid()}-{threading.get_ident()}.part"
+        chunk_size = getattr(settings, 'COHORT_CHUNK_SIZE', 2000)
+        done = 0
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+            for chunk in pd.read_csv(job.input_path, chunksize=chunk_size):
+                try:
+                    X = SCHEMA.parse_frame(chunk)
+                except ValueError as e:
+                    raise ValueError(f"Rows {done + 1}-{done + len(chunk)}: {e}")
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', UserWarning)
+                    predictions = model.predict(X)
+                chunk['prediction_class'] = predictions.astype(int)
+                chunk['prediction_label'] = [CLASS_LABELS.get(int(p), str(p)) for p in predictions]
+                chunk.to_csv(out, header=(done == 0), index=False)
+                done += len(chunk)
+                # progress doubles as the heartbeat that proves the owner is alive
+                if not mine.update(rows_done=done, updated_at=timezone.now()):
+                    print(f"Cohort job {pk} was taken over by another worker; stopping")
+                    return
+
+        # claim the DONE state before publishing the file, so a superseded worker never replaces it
+        if mine.update(status=ScoringJob.DONE, result_path=result_path, rows_total=done,
+                       finished_at=timezone.now(), updated_at=timezone.now()):
+            os.replace(tmp_path, result_path)
+    except Exception as e:
+        print(f"ERROR in cohort job {pk}: {e}")
+        mine.update(status=ScoringJob.FAILED, error=str(e), finished_at=timezone.now(),
+                    updated_at=timezone.now())
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with _lock:
+            _active.discard(key)
+        close_old_connections()
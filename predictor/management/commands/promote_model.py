@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.training import metadata_path, promote
+
+from .train_model import CANDIDATE_MODEL, SERVING_MODEL
+
+
+class Command(BaseCommand):
+    help = "Serve a trained candidate model: atomically replace the live model and its metadata."
+
+    def add_arguments(self, parser):
+        parser.add_argument('candidate', nargs='?', default=CANDIDATE_MODEL,
+                            help='Candidate written by train_model')
+        parser.add_argument('--output', default=SERVING_MODEL, help='Model path the app serves')
+
+    def handle(self, *args, **options):
+        try:
+            meta = promote(options['candidate'], options['output'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Test accuracy:  {meta['test_accuracy']:.3f}")
+        self.stdout.write(f"Latency:        {meta['latency']['single_row_ms']:.3f} ms/row")
+        self.stdout.write(self.style.SUCCESS(
+            f"Promoted {options['candidate']} to {options['output']} "
+            f"(metadata: {metadata_path(options['output'])}). Restart the server to load it."))
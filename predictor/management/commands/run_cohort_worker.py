@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from predictor import jobs
+from predictor.models import ScoringJob
+
+
+class Command(BaseCommand):
+    help = "Process queued cohort scoring jobs (local broker stand-in for COHORT_JOB_BROKER = 'db')."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds between queue checks')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Cohort worker started")
+        while True:
+            for pk in jobs.recover_jobs():
+                jobs.run_job(pk)
+                job = ScoringJob.objects.get(pk=pk)
+                self.stdout.write(f"Job {pk}: {job.status} ({job.rows_done} rows)")
+            if options['once']:
+                break
+            time.sleep(options['poll'])
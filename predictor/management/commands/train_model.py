@@ -0,0 +1,74 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.training import metadata_path, train
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'predictor', 'ml_model')
+SERVING_MODEL = os.path.join(MODEL_DIR, 'trained_model.joblib')
+CANDIDATE_MODEL = os.path.join(MODEL_DIR, 'candidate.joblib')
+
+
+class Command(BaseCommand):
+    help = ("Retrain the stress classifier (Scaler -> PCA -> SVC) with a parallel grid search. "
+            "Writes a candidate; use promote_model to serve it.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', help='Path to the survey dataset CSV')
+        parser.add_argument(
+            '--output',
+            default=CANDIDATE_MODEL,
+            help='Where to write the candidate model (metadata is written next to it)',
+        )
+        parser.add_argument('--baseline', default=SERVING_MODEL,
+                            help='Model to compare serving latency against (default: the served model)')
+        parser.add_argument('--cv', type=int, default=5, help='Number of cross-validation folds')
+        parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel workers (-1 = all cores)')
+        parser.add_argument('--test-size', type=float, default=0.2)
+        parser.add_argument('--random-state', type=int, default=42)
+        parser.add_argument('--probability', action='store_true',
+                            help='Fit SVC with probability=True so the survey page can show confidence')
+        parser.add_argument('--cache-dir', default=None,
+                            help='Keep the preprocessing cache here instead of a temp directory')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['dataset']):
+            raise CommandError(f"Dataset not found: {options['dataset']}")
+
+        self.stdout.write(f"Training on {options['dataset']} using {os.cpu_count()} cores...")
+        try:
+            meta = train(
+                options['dataset'],
+                options['output'],
+                cv=options['cv'],
+                n_jobs=options['n_jobs'],
+                test_size=options['test_size'],
+                random_state=options['random_state'],
+                probability=options['probability'],
+                cache_dir=options['cache_dir'],
+                verbose=1 if options['verbosity'] > 1 else 0,
+                baseline_path=options['baseline'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        latency = meta['latency']
+        self.stdout.write(f"Best params:    {meta['best_params']}")
+        self.stdout.write(f"CV accuracy:    {meta['cv_accuracy']:.3f}")
+        self.stdout.write(f"Test accuracy:  {meta['test_accuracy']:.3f}")
+        self.stdout.write(f"Latency:        {latency['single_row_ms']:.3f} ms/row "
+                          f"(p95 {latency['single_row_p95_ms']:.3f} ms, batch {latency['batch_ms_per_row']:.4f} ms/row)")
+
+        previous = meta.get('previous_latency')
+        if previous:
+            speedup = meta['speedup_vs_previous']
+            verdict = 'faster' if speedup >= 1 else 'slower'
+            self.stdout.write(f"Baseline model: {previous['single_row_ms']:.3f} ms/row -> "
+                              f"new model is {max(speedup, 1 / speedup):.2f}x {verdict} to serve")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Model written to {options['output']} (metadata: {metadata_path(options['output'])})"))
+        if os.path.abspath(options['output']) != os.path.abspath(SERVING_MODEL):
+            self.stdout.write("Not served yet: shadow-test it via SHADOW_MODELS, then run "
+                              f"`python manage.py promote_model {options['output']}`")
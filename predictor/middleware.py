@@ -0,0 +1,164 @@
+# middleware.py - admission control and per-client rate limiting
+
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+# Default policies. settings.RATE_LIMITS is merged over these: add new names,
+# replace a policy by reusing its name, or disable one by setting it to None.
+# rate = tokens refilled per second, burst = bucket size. Each policy applies per
+# client; all clients behind one IP (e.g. a school NAT) share a bucket that is
+# RATE_LIMIT_IP_FACTOR times larger.
+DEFAULT_RATE_LIMITS = {
+    'survey': {'path': '/survey/', 'methods': ['POST'], 'rate': 0.5, 'burst': 10},
+    'chat': {'path': '/api/chat/', 'methods': ['POST'], 'rate': 0.2, 'burst': 5, 'upstream': True},
+    'explain': {'path': '/api/explain/', 'methods': ['POST'], 'rate': 0.5, 'burst': 10},
+}
+
+
+class InMemoryBucketStore:
+    """
+    Token buckets held in this process. Fast, but not shared between workers.
+    At most max_keys buckets are kept; the least recently used is dropped first.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, now: float):
+        """Consume one token. Returns (allowed, seconds until a token is available)."""
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class CacheBucketStore:
+    """
+    Token buckets in a Django cache (e.g. Redis/Memcached) shared by all workers.
+    Read-modify-write is not atomic, so limits are approximate under contention.
+    """
+
+    def __init__(self, alias: str = 'default', prefix: str = 'ratelimit'):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+        self.prefix = prefix
+
+    def take(self, key: str, rate: float, burst: float, now: float):
+        cache_key = f"{self.prefix}:{key}"
+        tokens, stamp = self.cache.get(cache_key) or (burst, now)
+        tokens = min(burst, tokens + (now - stamp) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # expire once the bucket would be full again anyway
+        self.cache.set(cache_key, (tokens, now), timeout=math.ceil(burst / rate) + 1)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+CLIENT_COOKIE = 'stress_client'
+CLIENT_COOKIE_SALT = 'predictor.middleware.client'
+
+
+def _client_ip(request) -> str:
+    # X-Forwarded-For is client-controlled except for the entries our own
+    # proxies appended, so count RATE_LIMIT_PROXY_COUNT hops from the right.
+    hops = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if hops and forwarded:
+        entries = [entry.strip() for entry in forwarded.split(',')]
+        if len(entries) >= hops:
+            return entries[-hops]
+    return request.META.get('REMOTE_ADDR', 'unknown')
+
+
+def _client_id(request):
+    """The signed client id issued by the middleware, or None if absent or forged (no DB lookup)."""
+    return request.get_signed_cookie(CLIENT_COOKIE, default=None, salt=CLIENT_COOKIE_SALT)
+
+
+def _too_many(request, retry_after: float, message: str):
+    retry = max(1, math.ceil(retry_after))
+    if request.path.startswith('/api/'):
+        response = JsonResponse({'success': False, 'error': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain')
+    response['Retry-After'] = str(retry)
+    return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Per-client token-bucket rate limits plus a cap on concurrent upstream
+    (Gemini) calls. Rejected requests get an immediate 429 with Retry-After,
+    so excess load is shed before it reaches a view.
+
+    Clients are told apart by a signed id cookie this middleware issues; requests
+    without a valid one are limited per IP. The upstream cap is per process.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        policies = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'RATE_LIMITS', {})}
+        self.policies = [(name, policy) for name, policy in policies.items() if policy]
+        cache_alias = getattr(settings, 'RATE_LIMIT_CACHE', None)
+        self.store = CacheBucketStore(cache_alias) if cache_alias else InMemoryBucketStore()
+        self.upstream_slots = threading.BoundedSemaphore(getattr(settings, 'UPSTREAM_MAX_CONCURRENCY', 8))
+        self.ip_factor = getattr(settings, 'RATE_LIMIT_IP_FACTOR', 30)
+
+    def _match(self, request):
+        for name, policy in self.policies:
+            methods = policy.get('methods')
+            if request.path.startswith(policy['path']) and (not methods or request.method in methods):
+                return name, policy
+        return None, None
+
+    def __call__(self, request):
+        client_id = _client_id(request)
+        response = self._admit(request, client_id)
+        if client_id is None:
+            response.set_signed_cookie(
+                CLIENT_COOKIE, secrets.token_urlsafe(16), salt=CLIENT_COOKIE_SALT,
+                max_age=365 * 24 * 3600, httponly=True, samesite='Lax')
+        return response
+
+    def _admit(self, request, client_id):
+        name, policy = self._match(request)
+        if policy is None:
+            return self.get_response(request)
+
+        ip = _client_ip(request)
+        now = time.time()
+        # the shared per-IP bucket first: it also bounds clients that mint new ids
+        allowed, retry_after = self.store.take(
+            f"{name}:ip:{ip}", policy['rate'] * self.ip_factor, policy['burst'] * self.ip_factor, now)
+        if allowed:
+            client = f"c:{client_id}" if client_id else f"anon:{ip}"
+            allowed, retry_after = self.store.take(
+                f"{name}:{client}", policy['rate'], policy['burst'], now)
+        if not allowed:
+            return _too_many(request, retry_after, 'Too many requests. Please slow down.')
+
+        if not policy.get('upstream'):
+            return self.get_response(request)
+
+        if not self.upstream_slots.acquire(blocking=False):
+            return _too_many(request, 1, 'Service is busy. Please try again shortly.')
+        try:
+            return self.get_response(request)
+        finally:
+            self.upstream_slots.release()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoringjob',
+            name='owner',
+            field=models.CharField(blank=True, help_text='host:pid of the worker scoring this job', max_length=300),
+        ),
+    ]
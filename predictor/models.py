@@ -1,3 +1,45 @@
+import uuid
+
 from django.db import models
 
-# Create your models here.
+
+class ScoringJob(models.Model):
+    """A cohort survey file scored in the background. State is persisted so jobs survive restarts."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    original_name = models.CharField(max_length=255)
+    input_path = models.CharField(max_length=500)
+    result_path = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    owner = models.CharField(max_length=300, blank=True, help_text='host:pid of the worker scoring this job')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.original_name} ({self.status})"
+
+    @property
+    def progress(self) -> float:
+        if self.status == self.DONE:
+            return 100.0
+        if not self.rows_total:
+            return 0.0
+        return min(100.0, 100.0 * self.rows_done / self.rows_total)
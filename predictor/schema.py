@@ -0,0 +1,242 @@
+# schema.py - the single definition of the model's input features
+#
+# Every entry point (Django survey view, StressForm, batch APIs, training,
+# Streamlit app) reads features through SCHEMA so the model always gets the
+# same 25 columns, in the same order, with the same encodings.
+
+from collections import namedtuple
+
+import numpy as np
+
+FeatureSpec = namedtuple(
+    'FeatureSpec',
+    ['name', 'post_key', 'column', 'label', 'default', 'low', 'high', 'encoding'],
+)
+
+GENDER_ENCODING = {'Male': 0.0, 'Female': 1.0}
+
+# survey questions are answered on a whole-number 1-5 scale
+SCALE_LOW, SCALE_HIGH = 1.0, 5.0
+
+
+def _question(name, post_key, column, label, default=1):
+    return FeatureSpec(name, post_key, column, label, float(default), SCALE_LOW, SCALE_HIGH, None)
+
+
+FEATURES = (
+    FeatureSpec('gender', 'gender', 'Gender', 'Gender', 0.0, 0.0, 1.0, GENDER_ENCODING),
+    FeatureSpec('age', 'age', 'Age', 'Age', 20.0, 10.0, 100.0, None),
+    _question('stress_recent', 'stress_life',
+              'Have you recently experienced stress in your life?',
+              'Have you recently experienced stress in your life?'),
+    _question('rapid_heartbeat', 'heartbeat',
+              'Have you noticed a rapid heartbeat or palpitations?',
+              'Have you noticed a rapid heartbeat or palpitations?'),
+    _question('anxiety', 'anxiety',
+              'Have you been dealing with anxiety or tension recently?',
+              'Have you been dealing with anxiety or tension recently?'),
+    _question('sleep_problems', 'sleep',
+              'Do you face any sleep problems or difficulties falling asleep?',
+              'Do you face any sleep problems or difficulties falling asleep?'),
+    _question('difficulty_concentrate', 'concentration_general',
+              'Have you been dealing with anxiety or tension recently?.1',
+              'Are you finding difficulty to concentrate?'),
+    _question('headaches', 'headaches',
+              'Have you been getting headaches more often than usual?',
+              'Have you been getting headaches more often than usual?'),
+    _question('irritated', 'irritation',
+              'Do you get irritated easily?',
+              'Do you get irritated easily?'),
+    _question('trouble_academic_concentration', 'concentration_academic',
+              'Do you have trouble concentrating on your academic tasks?',
+              'Do you have trouble concentrating on your academic tasks?'),
+    _question('sadness_low_mood', 'sadness',
+              'Have you been feeling sadness or low mood?',
+              'Have you been feeling sadness or low mood?'),
+    _question('illness_health_issues', 'illness',
+              'Have you been experiencing any illness or health issues?',
+              'Have you been experiencing any illness or health issues?'),
+    _question('lonely_isolated', 'lonely',
+              'Do you often feel lonely or isolated?',
+              'Do you often feel lonely or isolated?'),
+    _question('overwhelmed_workload', 'workload',
+              'Do you feel overwhelmed with your academic workload?',
+              'Do you feel overwhelmed with your academic workload?'),
+    _question('competition_peers', 'competition',
+              'Are you in competition with your peers, and does it affect you?',
+              'Are you in competition with your peers, and does it affect you?'),
+    _question('relationship_stress', 'relationship',
+              'Do you find that your relationship often causes you stress?',
+              'Do you find that your relationship often causes you stress?'),
+    _question('difficulties_with_professors', 'professor_difficulty',
+              'Are you facing any difficulties with your professors or instructors?',
+              'Are you facing any difficulties with your professors or instructors?'),
+    _question('unpleasant_work_environment', 'work_environment',
+              'Is your working environment unpleasant or stressful?',
+              'Is your working environment unpleasant or stressful?'),
+    _question('no_time_relaxation', 'relaxation_time',
+              'Do you struggle to find time for relaxation and leisure activities?',
+              'Do you struggle to find time for relaxation and leisure activities?'),
+    _question('hostel_home_difficulties', 'home_environment',
+              'Is your hostel or home environment causing you difficulties?',
+              'Is your hostel or home environment causing you difficulties?'),
+    _question('lack_confidence_performance', 'confidence_performance',
+              'Do you lack confidence in your academic performance?',
+              'Do you lack confidence in your academic performance?'),
+    _question('lack_confidence_subject_choice', 'confidence_subjects',
+              'Do you lack confidence in your choice of academic subjects?',
+              'Do you lack confidence in your choice of academic subjects?'),
+    _question('conflict_academic_extracurricular', 'activities_conflict',
+              'Academic and extracurricular activities conflicting for you?',
+              'Academic and extracurricular activities conflicting for you?'),
+    _question('attend_classes_regularly', 'class_attendance',
+              'Do you attend classes regularly?',
+              'Do you attend classes regularly?', default=5),
+    _question('gained_lost_weight', 'weight_change',
+              'Have you gained/lost weight?',
+              'Have you gained/lost weight?'),
+)
+
+
+class FeatureSchema:
+    """
+    Precompiled view of FEATURES. Parsing writes straight into a float
+    buffer in model column order, so callers never build feature lists by hand.
+
+    Every feature is a whole number: encoded features take one of their
+    labels or exact codes, the rest an integer within [low, high].
+    """
+
+    def __init__(self, specs):
+        self.specs = tuple(specs)
+        self.size = len(self.specs)
+        self.names = [s.name for s in self.specs]
+        self.post_keys = [s.post_key for s in self.specs]
+        self.columns = [s.column for s in self.specs]
+        self.labels = {s.name: s.label for s in self.specs}
+        self.defaults = np.array([s.default for s in self.specs])
+        self.low = np.array([s.low for s in self.specs])
+        self.high = np.array([s.high for s in self.specs])
+        self.questions = tuple(s for s in self.specs if (s.low, s.high) == (SCALE_LOW, SCALE_HIGH))
+        self._specs = {s.name: s for s in self.specs}
+
+        # (index, lookup key, default, low, high, encoding, codes) per feature
+        self._by_post_key = tuple(
+            (i, s.post_key, s.default, s.low, s.high, s.encoding, self._codes(s))
+            for i, s in enumerate(self.specs))
+        self._by_name = tuple(
+            (i, s.name, s.default, s.low, s.high, s.encoding, self._codes(s))
+            for i, s in enumerate(self.specs))
+        self._name_set = frozenset(self.names)
+        self._encoded = tuple((i, np.array(sorted(self._codes(s)))) for i, s in enumerate(self.specs) if s.encoding)
+
+    def __iter__(self):
+        return iter(self.specs)
+
+    def __len__(self):
+        return self.size
+
+    def spec(self, name) -> FeatureSpec:
+        return self._specs[name]
+
+    @staticmethod
+    def _codes(spec):
+        return frozenset(spec.encoding.values()) if spec.encoding else None
+
+    def _buffer(self, out):
+        if out is None:
+            return np.empty((1, self.size))
+        if out.size != self.size:
+            raise ValueError(f"Buffer must hold {self.size} features, got {out.size}")
+        return out
+
+    @staticmethod
+    def _fill(data, plan, out, strict=False):
+        row = out.reshape(-1)
+        get = data.get
+        for i, key, default, low, high, encoding, codes in plan:
+            raw = get(key)
+            if raw is None or raw == '':
+                if strict:
+                    raise ValueError(f"Missing feature: {key}")
+                value = default
+            elif encoding is not None and raw in encoding:
+                value = encoding[raw]
+            else:
+                try:
+                    if isinstance(raw, bool):
+                        raise TypeError
+                    value = float(raw)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid value for {key}: {raw!r}")
+                if codes is not None and value not in codes:
+                    raise ValueError(f"Invalid value for {key}: {raw!r}")
+                if not value.is_integer():
+                    raise ValueError(f"{key} must be a whole number, got {raw!r}")
+            if not low <= value <= high:
+                raise ValueError(f"{key} must be between {low:g} and {high:g}, got {value:g}")
+            row[i] = value
+        return out
+
+    def parse_post(self, data, out=None) -> np.ndarray:
+        """
+        Parse survey POST data (QueryDict or dict keyed by form input names) into a (1, 25) array.
+        Unanswered questions fall back to their defaults, as the survey view always has.
+        """
+        return self._fill(data, self._by_post_key, self._buffer(out))
+
+    def parse_dict(self, data, out=None) -> np.ndarray:
+        """
+        Parse a dict keyed by feature name (e.g. StressForm.cleaned_data) into a (1, 25) array.
+        Strict: every feature must be present and unknown names are rejected.
+        """
+        unknown = [key for key in data if key not in self._name_set]
+        if unknown:
+            raise ValueError("Unknown features: " + ", ".join(map(str, unknown)))
+        return self._fill(data, self._by_name, self._buffer(out), strict=True)
+
+    def parse_frame(self, df) -> np.ndarray:
+        """
+        Select and order the model's columns from a DataFrame (dataset column
+        names or feature names), encode categoricals and validate ranges.
+        """
+        if all(c in df.columns for c in self.columns):
+            columns = self.columns
+        elif all(n in df.columns for n in self.names):
+            columns = self.names
+        else:
+            missing = [c for c in self.columns if c not in df.columns]
+            raise ValueError("Missing features: " + ", ".join(missing))
+
+        out = np.empty((len(df), self.size))
+        for i, column in enumerate(columns):
+            values = df[column]
+            encoding = self.specs[i].encoding
+            if encoding is not None and values.dtype.kind not in 'biuf':
+                values = values.map(lambda v: encoding.get(v, v))
+            out[:, i] = values.to_numpy(dtype=float)
+        return self.validate(out)
+
+    def validate(self, X) -> np.ndarray:
+        """Check shape, ranges and whole-number codes of an already-ordered feature matrix."""
+        if isinstance(X, (list, tuple)):
+            # JSON true/false would otherwise be read as 1.0/0.0
+            if any(isinstance(v, bool) for v in np.ravel(np.asarray(X, dtype=object))):
+                raise ValueError("Feature values must be numbers, not booleans")
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.ndim != 2 or X.shape[1] != self.size:
+            raise ValueError(f"Expected {self.size} features per row, got shape {X.shape}")
+        bad = (X < self.low) | (X > self.high) | np.isnan(X)
+        if bad.any():
+            row, col = np.argwhere(bad)[0]
+            raise ValueError(f"Row {row}: {self.names[col]} out of range ({X[row, col]:g})")
+        bad = X != np.round(X)
+        for i, codes in self._encoded:
+            bad[:, i] |= ~np.isin(X[:, i], codes)
+        if bad.any():
+            row, col = np.argwhere(bad)[0]
+            raise ValueError(f"Row {row}: {self.names[col]} must be a whole-number answer ({X[row, col]:g})")
+        return X
+
+
+SCHEMA = FeatureSchema(FEATURES)
@@ -0,0 +1,168 @@
+# shadow.py - off-request-path evaluation of candidate models
+
+import queue
+import threading
+import time
+import warnings
+
+import numpy as np
+
+
+class ShadowStats:
+    """Running agreement / class distribution / latency counters for one candidate."""
+
+    def __init__(self, n_classes: int = 3):
+        self.n_classes = n_classes
+        self.samples = 0
+        self.agreements = 0
+        self.class_counts = np.zeros(n_classes, dtype=np.int64)
+        self.primary_counts = np.zeros(n_classes, dtype=np.int64)
+        self.batch_seconds = 0.0
+        self.single_row_seconds = 0.0
+        self.single_row_samples = 0
+        self.errors = 0
+
+    def update(self, primary: np.ndarray, predicted: np.ndarray, batch_seconds: float,
+               single_row_seconds: float):
+        self.samples += len(predicted)
+        self.agreements += int((primary == predicted).sum())
+        self.class_counts += np.bincount(predicted.clip(0, self.n_classes - 1), minlength=self.n_classes)
+        self.primary_counts += np.bincount(primary.clip(0, self.n_classes - 1), minlength=self.n_classes)
+        self.batch_seconds += batch_seconds
+        self.single_row_seconds += single_row_seconds
+        self.single_row_samples += 1
+
+    def as_dict(self) -> dict:
+        if self.samples:
+            candidate_dist = self.class_counts / self.samples
+            primary_dist = self.primary_counts / self.samples
+            # total variation distance between the two class distributions
+            drift = float(0.5 * np.abs(candidate_dist - primary_dist).sum())
+            agreement = self.agreements / self.samples
+            batch_ms = self.batch_seconds * 1000 / self.samples
+            single_ms = self.single_row_seconds * 1000 / self.single_row_samples
+        else:
+            candidate_dist = primary_dist = np.zeros(self.n_classes)
+            drift = agreement = batch_ms = single_ms = None
+        return {
+            'samples': self.samples,
+            'agreement_rate': agreement,
+            'class_distribution': candidate_dist.tolist(),
+            'primary_class_distribution': primary_dist.tolist(),
+            'class_drift': drift,
+            # comparable to the primary's single_row_ms (one row per predict, as on the request path)
+            'single_row_ms': single_ms,
+            # amortised over shadow batches; not what a request would see
+            'batch_ms_per_row': batch_ms,
+            'errors': self.errors,
+        }
+
+
+class ShadowEvaluator:
+    """
+    Scores live feature vectors with candidate models on a background thread.
+
+    The request path only does a non-blocking put into a bounded queue; when
+    the queue is full the sample is dropped, so shadowing never adds latency
+    to the user-facing response.
+    """
+
+    def __init__(self, candidates: dict, max_queue: int = 1000, batch_size: int = 64,
+                 n_classes: int = 3, flush_interval: float = 0.5):
+        self.candidates = dict(candidates)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats = {name: ShadowStats(n_classes) for name in self.candidates}
+        self._primary_seconds = 0.0
+        self._primary_samples = 0
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='shadow-evaluator', daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def submit(self, features, primary_prediction: int, primary_seconds: float = 0.0) -> bool:
+        """Queue one feature row for shadow scoring. Returns False if it was dropped."""
+        # copy: callers may reuse their feature buffer after submitting
+        row = np.array(features, dtype=float).reshape(-1)
+        try:
+            self._queue.put_nowait((row, int(primary_prediction), primary_seconds))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _drain(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._drain()
+            if batch:
+                self._score(batch)
+
+    def _score(self, batch: list):
+        rows = np.vstack([item[0] for item in batch])
+        primary = np.array([item[1] for item in batch], dtype=np.int64)
+        primary_seconds = sum(item[2] for item in batch)
+
+        results = {}
+        for name, candidate in self.candidates.items():
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', UserWarning)
+                    start = time.perf_counter()
+                    predicted = np.asarray(candidate.predict(rows), dtype=np.int64)
+                    batch_seconds = time.perf_counter() - start
+                    # time one row on its own too, the way the view calls the primary
+                    start = time.perf_counter()
+                    candidate.predict(rows[:1])
+                    results[name] = (predicted, batch_seconds, time.perf_counter() - start)
+            except Exception as e:
+                print(f"Shadow model {name} failed: {e}")
+                results[name] = None
+
+        with self._lock:
+            self._primary_seconds += primary_seconds
+            self._primary_samples += len(batch)
+            for name, result in results.items():
+                if result is None:
+                    self._stats[name].errors += len(batch)
+                else:
+                    self._stats[name].update(primary, *result)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            primary_latency = (self._primary_seconds * 1000 / self._primary_samples
+                               if self._primary_samples else None)
+            return {
+                'queued': self._queue.qsize(),
+                'dropped': self.dropped,
+                'primary': {
+                    'samples': self._primary_samples,
+                    'single_row_ms': primary_latency,
+                },
+                'candidates': {name: stats.as_dict() for name, stats in self._stats.items()},
+            }
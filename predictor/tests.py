@@ -1,3 +1,637 @@
-from django.test import TestCase
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+import joblib
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from . import jobs
+from .explain import FeatureExplainer
+from .forms import StressForm
+from .middleware import CLIENT_COOKIE, AdmissionControlMiddleware, CacheBucketStore, InMemoryBucketStore
+from .models import ScoringJob
+from .schema import SCHEMA, GENDER_ENCODING
+from .shadow import ShadowEvaluator
+from .training import build_pipeline, metadata_path, promote, train
+from .utils import DATASET_COLUMNS, TARGET_COLUMN, build_feature_vector
+
+
+class LinearStub:
+    """Deterministic 3-class scorer that counts how often and on how many rows it is called."""
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.weights = rng.normal(size=(SCHEMA.size, 3))
+        self.calls = 0
+        self.rows = 0
+
+    def decision_function(self, X):
+        self.calls += 1
+        self.rows += len(X)
+        return np.asarray(X) @ self.weights
+
+    def predict(self, X):
+        return self.decision_function(X).argmax(axis=1)
+
+
+def survey(value=3.0, gender=0.0, age=20.0):
+    row = np.full(SCHEMA.size, value)
+    row[0], row[1] = gender, age
+    return row
+
+
+class FeatureExplainerTests(TestCase):
+
+    def setUp(self):
+        self.model = LinearStub()
+        self.explainer = FeatureExplainer(self.model, background=SCHEMA.defaults, cache_size=2)
+
+    def test_batch_is_scored_in_one_call(self):
+        X = np.vstack([survey(2), survey(4), survey(5, gender=1)])
+        self.explainer.explain(X)
+        self.assertEqual(self.model.calls, 1)
+        # the original rows plus one perturbed row per feature
+        self.assertEqual(self.model.rows, 3 * (1 + SCHEMA.size))
+
+    def test_matches_one_call_per_feature(self):
+        x = survey(4, gender=1, age=23)
+        top = self.explainer.explain(x, top_k=SCHEMA.size)[0]
+
+        base = self.model.decision_function(x[None])[0]
+        cls = base.argmax()
+        for factor in top:
+            j = SCHEMA.names.index(factor['feature'])
+            occluded = x.copy()
+            occluded[j] = SCHEMA.defaults[j]
+            expected = base[cls] - self.model.decision_function(occluded[None])[0][cls]
+            self.assertAlmostEqual(factor['contribution'], expected)
+
+    def test_cache_hit_skips_model(self):
+        x = survey(4)
+        first = self.explainer.explain(x)
+        calls = self.model.calls
+        self.assertEqual(self.explainer.explain(x), first)
+        self.assertEqual(self.model.calls, calls)
+
+    def test_cache_evicts_least_recent(self):
+        a, b, c = survey(2), survey(3), survey(4)
+        self.explainer.explain(np.vstack([a, b]))
+        self.explainer.explain(c)  # cache_size=2: a is evicted
+        calls = self.model.calls
+        self.explainer.explain(np.vstack([b, c]))
+        self.assertEqual(self.model.calls, calls)
+        self.explainer.explain(a)
+        self.assertEqual(self.model.calls, calls + 1)
+
+    def test_duplicates_in_batch_are_scored_once(self):
+        x = survey(4)
+        results = self.explainer.explain(np.vstack([x, x, x]))
+        self.assertEqual(self.model.rows, 1 + SCHEMA.size)
+        self.assertEqual(results[0], results[2])
+
+    def test_gender_is_shown_as_answer(self):
+        explainer = FeatureExplainer(self.model, background=SCHEMA.defaults, labels=SCHEMA.labels)
+        factors = explainer.explain(survey(4, gender=1), top_k=SCHEMA.size)[0]
+        for factor in factors:
+            if factor['feature'] == 'gender':
+                self.assertEqual(factor['answer'], 'Female')
+            else:
+                self.assertEqual(factor['answer'], f"{factor['value']:g}")
+
+
+class ExplainApiTests(TestCase):
+
+    def post(self, payload):
+        body = payload if isinstance(payload, str) else json.dumps(payload)
+        return self.client.post('/api/explain/', body, content_type='application/json')
+
+    def test_explains_batch(self):
+        response = self.post({'surveys': [survey(4).tolist(), survey(2).tolist()], 'top_k': 3})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 2)
+        self.assertLessEqual(len(results[0]['top_factors']), 3)
+
+    def test_bad_input_is_400(self):
+        self.assertEqual(self.post('null').status_code, 400)
+        self.assertEqual(self.post('{not json').status_code, 400)
+        self.assertEqual(self.post({'surveys': []}).status_code, 400)
+        self.assertEqual(self.post({'surveys': [[1, 2, 3]]}).status_code, 400)
+        # partial or misspelled dict surveys are rejected, not filled with defaults
+        self.assertEqual(self.post({'surveys': [{'gender': 1, 'age': 22}]}).status_code, 400)
+
+    @override_settings(EXPLAIN_MAX_BATCH=2)
+    def test_oversized_batch_is_413(self):
+        response = self.post({'surveys': [survey().tolist()] * 3})
+        self.assertEqual(response.status_code, 413)
+
+    @override_settings(EXPLAIN_MAX_BATCH=2)
+    def test_nested_survey_cannot_bypass_batch_limit(self):
+        response = self.post({'surveys': [[survey().tolist()] * 50]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post({'surveys': [[[1, 2], [3]]]}).status_code, 400)
+
+    def test_top_k_is_bounded(self):
+        for top_k in (0, -20, SCHEMA.size + 1, 'all'):
+            self.assertEqual(self.post({'surveys': [survey().tolist()], 'top_k': top_k}).status_code, 400)
+        response = self.post({'surveys': [survey(4).tolist()], 'top_k': SCHEMA.size})
+        self.assertEqual(response.status_code, 200)
+
+
+class TrainingTests(TestCase):
+
+    def test_train_writes_model_and_metadata(self):
+        rng = np.random.default_rng(0)
+        n = 90
+        df = pd.DataFrame(rng.integers(1, 6, (n, SCHEMA.size)), columns=DATASET_COLUMNS)
+        df['Gender'] = rng.choice(['Male', 'Female'], n)
+        df['Age'] = rng.integers(18, 25, n)
+        score = df[DATASET_COLUMNS[2:]].sum(axis=1)
+        df[TARGET_COLUMN] = np.where(score > 75, 'Distress', np.where(score > 68, 'Eustress', 'No Stress'))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = os.path.join(tmp, 'survey.csv')
+            output = os.path.join(tmp, 'model.joblib')
+            df.to_csv(dataset, index=False)
+            grid = {'pca__n_components': [5], 'svc__kernel': ['linear'], 'svc__C': [1]}
+
+            meta = train(dataset, output, cv=2, n_jobs=1, param_grid=grid)
+            self.assertTrue(os.path.exists(output))
+            with open(metadata_path(output)) as f:
+                saved = json.load(f)
+            self.assertEqual(saved['feature_order'], SCHEMA.names)
+            self.assertEqual(saved['class_map'], {'0': 'Distress', '1': 'Eustress', '2': 'No Stress'})
+            self.assertIsNone(meta['previous_latency'])
+
+            # retraining over an existing artifact benchmarks it
+            meta = train(dataset, output, cv=2, n_jobs=1, param_grid=grid)
+            self.assertIn('speedup_vs_previous', meta)
+            self.assertEqual(sorted(os.listdir(tmp)), ['model.joblib', 'model.meta.json', 'survey.csv'])
+
+    def test_promote_swaps_candidate_and_metadata_in(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            candidate = os.path.join(tmp, 'candidate.joblib')
+            serving = os.path.join(tmp, 'trained_model.joblib')
+            with self.assertRaises(ValueError):
+                promote(candidate, serving)
+
+            joblib.dump(LinearStub(), candidate)
+            with open(metadata_path(candidate), 'w') as f:
+                json.dump({'test_accuracy': 0.9}, f)
+            self.assertEqual(promote(candidate, serving), {'test_accuracy': 0.9})
+            self.assertIsInstance(joblib.load(serving), LinearStub)
+            self.assertEqual(sorted(os.listdir(tmp)), ['candidate.joblib', 'candidate.meta.json',
+                                                       'trained_model.joblib', 'trained_model.meta.json'])
+
+    def test_probability_is_only_passed_when_requested(self):
+        X = np.tile(np.arange(SCHEMA.size, dtype=float), (6, 1)) + np.arange(6)[:, None]
+        y = np.array([0, 1] * 3)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', FutureWarning)
+            build_pipeline().fit(X, y)
+
+
+class BucketStoreTests(TestCase):
+
+    def check_refill(self, store):
+        # burst 2, one token every 2 seconds
+        self.assertEqual(store.take('k', 0.5, 2, now=100.0), (True, 0.0))
+        self.assertEqual(store.take('k', 0.5, 2, now=100.0), (True, 0.0))
+        allowed, retry_after = store.take('k', 0.5, 2, now=100.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 2.0)
+        self.assertFalse(store.take('k', 0.5, 2, now=101.0)[0])
+        self.assertTrue(store.take('k', 0.5, 2, now=103.0)[0])
+        # other clients have their own bucket
+        self.assertTrue(store.take('other', 0.5, 2, now=103.0)[0])
+
+    def test_in_memory_refill(self):
+        self.check_refill(InMemoryBucketStore())
+
+    @override_settings(CACHES={'ratelimit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cache_store_refill(self):
+        self.check_refill(CacheBucketStore('ratelimit'))
+
+    def test_in_memory_store_is_bounded(self):
+        store = InMemoryBucketStore(max_keys=3)
+        for i in range(10):
+            store.take(f'k{i}', 1, 1, now=0.0)
+        self.assertEqual(list(store._buckets), ['k7', 'k8', 'k9'])
+
+
+@override_settings(RATE_LIMITS={
+    'survey': {'path': '/survey/', 'methods': ['POST'], 'rate': 0.001, 'burst': 2},
+    'chat': {'path': '/api/chat/', 'methods': ['POST'], 'rate': 0.001, 'burst': 5, 'upstream': True},
+}, RATE_LIMIT_CACHE=None)
+class AdmissionControlTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def stack(self, view=None):
+        return AdmissionControlMiddleware(view or (lambda request: HttpResponse('ok')))
+
+    def post(self, app, path='/api/chat/', client=None, ip='10.0.0.1', **extra):
+        request = self.factory.post(path, REMOTE_ADDR=ip, **extra)
+        if client:
+            request.COOKIES[CLIENT_COOKIE] = client
+        return app(request)
+
+    def issue_client(self, app):
+        return app(self.factory.get('/')).cookies[CLIENT_COOKIE].value
+
+    def test_429_with_retry_after(self):
+        app = self.stack()
+        self.assertEqual([self.post(app, '/survey/').status_code for _ in range(3)], [200, 200, 429])
+        response = self.post(app, '/survey/')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # GET is not limited by the survey policy
+        self.assertEqual(app(self.factory.get('/survey/', REMOTE_ADDR='10.0.0.1')).status_code, 200)
+
+    def test_api_429_is_json(self):
+        app = self.stack()
+        for _ in range(5):
+            self.post(app)
+        response = self.post(app)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(json.loads(response.content)['success'])
+
+    def test_forged_client_cookies_share_ip_bucket_without_db_queries(self):
+        app = self.stack()
+        with self.assertNumQueries(0):
+            codes = [self.post(app, client=uuid.uuid4().hex).status_code for _ in range(20)]
+        self.assertEqual(codes.count(200), 5)
+
+    def test_issued_client_gets_own_bucket(self):
+        app = self.stack()
+        for _ in range(5):
+            self.post(app)
+        self.assertEqual(self.post(app).status_code, 429)
+        client = self.issue_client(app)
+        self.assertEqual(self.post(app, client=client).status_code, 200)
+        # a valid cookie is not re-issued
+        self.assertNotIn(CLIENT_COOKIE, self.post(app, client=client).cookies)
+
+    @override_settings(RATE_LIMIT_IP_FACTOR=2)
+    def test_clients_behind_one_ip_share_a_larger_bucket(self):
+        app = self.stack()
+        clients = [self.issue_client(app) for _ in range(3)]
+        codes = [self.post(app, client=client).status_code for client in clients for _ in range(5)]
+        self.assertEqual(codes.count(200), 10)  # 2 x burst, not 3 x burst
+
+    @override_settings(RATE_LIMIT_PROXY_COUNT=1)
+    def test_forwarded_for_uses_proxy_appended_entry(self):
+        app = self.stack()
+        codes = [self.post(app, HTTP_X_FORWARDED_FOR=f'{uuid.uuid4().hex}, 203.0.113.7').status_code
+                 for _ in range(10)]
+        self.assertEqual(codes.count(200), 5)
+        self.assertEqual(self.post(app, HTTP_X_FORWARDED_FOR='203.0.113.8').status_code, 200)
+
+    @override_settings(UPSTREAM_MAX_CONCURRENCY=1)
+    def test_upstream_concurrency_cap(self):
+        inner = []
+
+        def view(request):
+            # a second client arriving while this upstream call is in flight
+            if not inner:
+                inner.append(self.post(app, ip='10.0.0.2'))
+            return HttpResponse('ok')
+
+        app = self.stack(view)
+        self.assertEqual(self.post(app).status_code, 200)
+        self.assertEqual(inner[0].status_code, 429)
+        self.assertIn('busy', json.loads(inner[0].content)['error'])
+        # the slot is released afterwards
+        self.assertEqual(self.post(app, ip='10.0.0.3').status_code, 200)
+
+
+class FeatureSchemaTests(TestCase):
+
+    def answers(self, value=3):
+        return {name: value for name in SCHEMA.names} | {'gender': 1, 'age': 21}
+
+    def test_post_uses_post_keys_and_defaults(self):
+        data = QueryDict('gender=Male&age=22&stress_life=4&weight_change=2')
+        row = SCHEMA.parse_post(data)[0]
+        self.assertEqual(row.shape, (SCHEMA.size,))
+        self.assertEqual(row[0], 0.0)  # Male -> 0
+        self.assertEqual(row[1], 22.0)
+        self.assertEqual(row[SCHEMA.names.index('stress_recent')], 4.0)
+        self.assertEqual(row[SCHEMA.names.index('gained_lost_weight')], 2.0)
+        # unanswered questions take their defaults
+        self.assertEqual(row[SCHEMA.names.index('attend_classes_regularly')], 5.0)
+        self.assertEqual(row[SCHEMA.names.index('headaches')], 1.0)
+
+    def test_gender_encoding(self):
+        self.assertEqual(GENDER_ENCODING, {'Male': 0.0, 'Female': 1.0})
+        self.assertEqual(SCHEMA.parse_post({'gender': 'Female'})[0, 0], 1.0)
+        self.assertEqual(SCHEMA.parse_post({'gender': 'Male'})[0, 0], 0.0)
+
+    def test_dict_is_strict(self):
+        row = SCHEMA.parse_dict(self.answers(4))
+        self.assertEqual(row[0, 0], 1.0)
+        self.assertTrue((row[0, 2:] == 4).all())
+
+        partial = self.answers()
+        del partial['anxiety']
+        with self.assertRaisesRegex(ValueError, 'Missing feature: anxiety'):
+            SCHEMA.parse_dict(partial)
+        with self.assertRaisesRegex(ValueError, 'Unknown features: anxeity'):
+            SCHEMA.parse_dict(partial | {'anxeity': 3})
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_dict({})
+
+    def test_stress_form_feeds_schema(self):
+        form = StressForm(data=self.answers(2))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(list(form.cleaned_data), SCHEMA.names)
+        row = build_feature_vector(form.cleaned_data)
+        self.assertEqual(row[0, 0], 1.0)
+        self.assertTrue((row[0, 2:] == 2).all())
+
+    def test_frame_orders_and_encodes_columns(self):
+        frame = pd.DataFrame([self.answers(5) | {'gender': 'Male'}])
+        frame = frame[list(reversed(SCHEMA.names))]  # deliberately misordered
+        X = SCHEMA.parse_frame(frame)
+        self.assertEqual(X[0, 0], 0.0)
+        self.assertEqual(X[0, 1], 21.0)
+        self.assertTrue((X[0, 2:] == 5).all())
+
+        by_column = pd.DataFrame(X, columns=SCHEMA.columns)
+        np.testing.assert_array_equal(SCHEMA.parse_frame(by_column), X)
+
+        with self.assertRaisesRegex(ValueError, 'Missing features'):
+            SCHEMA.parse_frame(frame.drop(columns=['anxiety']))
+
+    def test_out_of_range_and_nan_rejected(self):
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_post({'stress_life': '6'})
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_post({'age': '5'})
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_post({'sleep': 'nan'})
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_post({'sleep': 'often'})
+
+        X = SCHEMA.parse_dict(self.answers())
+        X[0, 5] = np.nan
+        with self.assertRaises(ValueError):
+            SCHEMA.validate(X)
+        with self.assertRaises(ValueError):
+            SCHEMA.validate(np.ones((1, SCHEMA.size - 1)))
+        frame = pd.DataFrame(SCHEMA.parse_dict(self.answers()), columns=SCHEMA.names)
+        frame.loc[0, 'lonely_isolated'] = np.nan
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_frame(frame)
+
+    def test_only_whole_number_answers_and_exact_codes(self):
+        for data in ({'gender': '0.5'}, {'gender': '2'}, {'stress_life': '3.5'}, {'age': '20.7'}):
+            with self.assertRaises(ValueError, msg=data):
+                SCHEMA.parse_post(data)
+        # exact codes and integral floats are still fine
+        self.assertEqual(SCHEMA.parse_post({'gender': '1', 'age': '21.0'})[0, :2].tolist(), [1.0, 21.0])
+
+        with self.assertRaisesRegex(ValueError, 'anxiety'):
+            SCHEMA.parse_dict(self.answers() | {'anxiety': True})
+        with self.assertRaisesRegex(ValueError, 'age'):
+            SCHEMA.parse_dict(self.answers() | {'age': 20.5})
+
+        row = SCHEMA.parse_dict(self.answers())[0].tolist()
+        for bad in ([True] + row[1:], [0.5] + row[1:], row[:2] + [3.5] + row[3:]):
+            with self.assertRaises(ValueError):
+                SCHEMA.validate(bad)
+        frame = pd.DataFrame([row], columns=SCHEMA.names)
+        frame.loc[0, 'age'] = 20.7
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_frame(frame)
+
+    def test_spec_lookup_and_questions(self):
+        self.assertEqual(SCHEMA.spec('age').column, 'Age')
+        self.assertEqual([s.name for s in SCHEMA.questions], SCHEMA.names[2:])
+
+    def test_out_buffer_is_reused(self):
+        buffer = np.zeros((1, SCHEMA.size))
+        result = SCHEMA.parse_post({'stress_life': '2'}, out=buffer)
+        self.assertIs(result, buffer)
+        self.assertEqual(buffer[0, 2], 2.0)
+        SCHEMA.parse_dict(self.answers(5), out=buffer)
+        self.assertEqual(buffer[0, 2], 5.0)
+        with self.assertRaises(ValueError):
+            SCHEMA.parse_post({}, out=np.zeros(3))
+
+    def test_shipped_models_match_schema_columns(self):
+        for path in ('trained_model.joblib',
+                     os.path.join('predictor', 'ml_model', 'trained_model.joblib'),
+                     os.path.join('predictor', 'artifacts', 'trained_model.joblib')):
+            model = joblib.load(os.path.join(settings.BASE_DIR, path))
+            self.assertEqual(list(model.feature_names_in_), SCHEMA.columns, path)
+
+
+class ScoringJobTests(TestCase):
+    """Jobs run through the 'db' broker so scoring happens synchronously in the test's transaction."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(COHORT_JOBS_DIR=tmp.name, COHORT_CHUNK_SIZE=2,
+                                      COHORT_JOB_BROKER='db', RATE_LIMITS={})
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def cohort_csv(self, rows=5):
+        df = pd.DataFrame(np.full((rows, SCHEMA.size), 3), columns=DATASET_COLUMNS)
+        df['Gender'] = ['Male', 'Female'] * (rows // 2) + ['Male'] * (rows % 2)
+        df['Age'] = 20
+        return SimpleUploadedFile('class 7b.csv', df.to_csv(index=False).encode(), content_type='text/csv')
+
+    def upload(self, rows=5):
+        response = self.client.post('/api/jobs/', {'file': self.cohort_csv(rows)})
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def running_job(self, owner, age=timedelta(0)):
+        job = ScoringJob.objects.create(original_name='x.csv', input_path='x.csv')
+        ScoringJob.objects.filter(pk=job.pk).update(
+            status=ScoringJob.RUNNING, owner=owner, updated_at=timezone.now() - age)
+        return job
+
+    def test_upload_score_status_download(self):
+        created = self.upload()
+        self.assertEqual(created['status'], 'queued')
+        self.assertNotIn('download_url', created)
+
+        call_command('run_cohort_worker', '--once', stdout=io.StringIO())
+
+        status = self.client.get(created['status_url']).json()
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual((status['rows_done'], status['rows_total'], status['progress']), (5, 5, 100.0))
+
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="class 7b_scored.csv"')
+        scored = pd.read_csv(io.BytesIO(b''.join(response.streaming_content)))
+        response.close()
+        self.assertEqual(len(scored), 5)  # chunk headers are written once
+        self.assertEqual(list(scored.columns[-2:]), ['prediction_class', 'prediction_label'])
+        self.assertTrue(scored['prediction_label'].isin(jobs.CLASS_LABELS.values()).all())
+
+    def test_invalid_rows_fail_the_job(self):
+        df = pd.DataFrame(np.full((3, SCHEMA.size), 3), columns=DATASET_COLUMNS)
+        df['Gender'] = 'Female'
+        df['Age'] = 20
+        df.loc[2, 'Age'] = 500
+        upload = SimpleUploadedFile('bad.csv', df.to_csv(index=False).encode())
+        job_id = self.client.post('/api/jobs/', {'file': upload}).json()['job_id']
+        jobs.run_job(job_id)
+        job = ScoringJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, ScoringJob.FAILED)
+        self.assertIn('Rows 3-3', job.error)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/download/').status_code, 404)
+
+    def test_claim_is_atomic(self):
+        job_id = self.upload()['job_id']
+        self.assertTrue(jobs._claim(job_id))
+        self.assertFalse(jobs._claim(job_id))
+        job = ScoringJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.owner), (ScoringJob.RUNNING, jobs.current_owner()))
+
+    def test_status_poll_right_after_claim_keeps_job(self):
+        job_id = self.upload()['job_id']
+        polled = []
+        claim = jobs._claim
+
+        def claim_then_poll(pk):
+            claimed = claim(pk)
+            polled.append(jobs.check_job(ScoringJob.objects.get(pk=pk)).status)
+            return claimed
+
+        with mock.patch.object(jobs, '_claim', claim_then_poll):
+            jobs.run_job(job_id)
+        self.assertEqual(polled, ['running'])
+        self.assertEqual(ScoringJob.objects.get(pk=job_id).status, ScoringJob.DONE)
+
+    def test_superseded_worker_stops_without_touching_state(self):
+        job_id = self.upload()['job_id']
+        job_dir = os.path.dirname(ScoringJob.objects.get(pk=job_id).input_path)
+        model = jobs.get_model()
+
+        def predict(X):
+            # another worker re-queued and re-claimed the job mid-run
+            ScoringJob.objects.filter(pk=job_id).update(owner='other-host:1', rows_done=0)
+            return model.predict(X)
+
+        with mock.patch.object(jobs, 'get_model', return_value=mock.Mock(predict=predict)):
+            jobs.run_job(job_id)
+        job = ScoringJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.owner, job.rows_done), (ScoringJob.RUNNING, 'other-host:1', 0))
+        self.assertEqual(os.listdir(job_dir), ['input.csv'])
+
+    def test_recovery_requeues_jobs_whose_owner_is_gone(self):
+        dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+        dead.wait()
+        gone = [
+            self.running_job(''),                                          # never recorded
+            self.running_job(jobs.current_owner()),                        # this process, not scoring it
+            self.running_job(f'{jobs.HOSTNAME}:{dead.pid}'),               # crashed local worker
+            self.running_job('other-host:1', age=jobs.STALE_AFTER * 2),    # silent remote worker
+        ]
+        alive = self.running_job('other-host:1', age=timedelta(seconds=10))
+
+        queued = jobs.recover_jobs()
+        self.assertEqual(set(queued), {job.pk for job in gone})
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, ScoringJob.RUNNING)
+
+    def test_status_endpoint_requeues_orphaned_job(self):
+        job_id = self.upload()['job_id']
+        ScoringJob.objects.filter(pk=job_id).update(status=ScoringJob.RUNNING, owner=jobs.current_owner())
+
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/').json()['status'], 'queued')
+        jobs.run_job(job_id)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/').json()['status'], 'done')
+
+
+class ConstantModel:
+    def __init__(self, label):
+        self.label = label
+
+    def predict(self, X):
+        return np.full(len(X), self.label)
+
+
+class BrokenModel:
+    def predict(self, X):
+        raise RuntimeError('boom')
+
+
+class ShadowEvaluatorTests(TestCase):
+    """Batches are scored by calling _drain/_score directly, without the background thread."""
+
+    def drain(self, shadow):
+        while True:
+            batch = shadow._drain()
+            if not batch:
+                return
+            shadow._score(batch)
+
+    def test_full_queue_drops_samples(self):
+        shadow = ShadowEvaluator({'c': ConstantModel(0)}, max_queue=2, flush_interval=0)
+        self.assertTrue(shadow.submit(survey(), 0))
+        self.assertTrue(shadow.submit(survey(), 0))
+        self.assertFalse(shadow.submit(survey(), 0))
+        snapshot = shadow.snapshot()
+        self.assertEqual((snapshot['queued'], snapshot['dropped']), (2, 1))
+
+    def test_agreement_and_drift(self):
+        shadow = ShadowEvaluator({'zero': ConstantModel(0), 'two': ConstantModel(2)},
+                                 batch_size=3, flush_interval=0)
+        for primary in (0, 0, 1, 2):
+            shadow.submit(survey(), primary, primary_seconds=0.002)
+        self.drain(shadow)
+
+        snapshot = shadow.snapshot()
+        self.assertEqual(snapshot['primary']['samples'], 4)
+        self.assertAlmostEqual(snapshot['primary']['single_row_ms'], 2.0)
+        zero, two = snapshot['candidates']['zero'], snapshot['candidates']['two']
+        self.assertEqual(zero['samples'], 4)
+        self.assertEqual(zero['agreement_rate'], 0.5)
+        self.assertEqual(zero['class_distribution'], [1.0, 0.0, 0.0])
+        self.assertEqual(zero['primary_class_distribution'], [0.5, 0.25, 0.25])
+        self.assertAlmostEqual(zero['class_drift'], 0.5)
+        self.assertEqual(two['agreement_rate'], 0.25)
+        self.assertAlmostEqual(two['class_drift'], 0.75)
+        self.assertIsNotNone(zero['single_row_ms'])
+        self.assertIsNotNone(zero['batch_ms_per_row'])
+
+    def test_failing_candidate_counts_errors(self):
+        shadow = ShadowEvaluator({'ok': ConstantModel(1), 'broken': BrokenModel()}, flush_interval=0)
+        shadow.submit(survey(), 1)
+        shadow.submit(survey(), 1)
+        self.drain(shadow)
+        candidates = shadow.snapshot()['candidates']
+        self.assertEqual((candidates['broken']['errors'], candidates['broken']['samples']), (2, 0))
+        self.assertEqual((candidates['ok']['errors'], candidates['ok']['agreement_rate']), (0, 1.0))
+
+    def test_background_worker_scores_submitted_rows(self):
+        shadow = ShadowEvaluator({'c': ConstantModel(0)}, flush_interval=0.01).start()
+        self.addCleanup(shadow.stop)
+        shadow.submit(survey(), 0)
+        deadline = time.monotonic() + 5
+        while shadow.snapshot()['candidates']['c']['samples'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(shadow.snapshot()['candidates']['c']['agreement_rate'], 1.0)
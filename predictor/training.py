@@ -0,0 +1,210 @@
+# training.py - reproducible training of the Scaler -> PCA -> SVC pipeline
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.decomposition import PCA
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.svm import SVC
+
+from .schema import SCHEMA
+from .utils import DATASET_COLUMNS, FEATURE_ORDER, TARGET_COLUMN
+
+DEFAULT_PARAM_GRID = [
+    {
+        'pca__n_components': [5, 10, 15, 20, 25],
+        'svc__kernel': ['linear'],
+        'svc__C': [0.01, 0.1, 1, 10],
+    },
+    {
+        'pca__n_components': [5, 10, 15, 20, 25],
+        'svc__kernel': ['rbf'],
+        'svc__C': [0.1, 1, 10, 100],
+        'svc__gamma': ['scale', 0.001, 0.01, 0.1],
+    },
+]
+
+
+def metadata_path(model_path) -> str:
+    """Metadata is stored next to the model: trained_model.joblib -> trained_model.meta.json"""
+    root, _ = os.path.splitext(str(model_path))
+    return root + '.meta.json'
+
+
+def load_dataset(path, target: str = TARGET_COLUMN):
+    """
+    Load the survey CSV and return (X, y, class_names).
+    X has DATASET_COLUMNS in training order; y is label-encoded so that
+    0 = Distress, 1 = Eustress, 2 = No Stress (alphabetical order of labels).
+    """
+    df = pd.read_csv(path)
+    missing = [c for c in DATASET_COLUMNS + [target] if c not in df.columns]
+    if missing:
+        raise ValueError("Dataset is missing columns: " + ", ".join(missing))
+
+    df = df.dropna(subset=DATASET_COLUMNS + [target])
+    X = pd.DataFrame(SCHEMA.parse_frame(df), columns=DATASET_COLUMNS, index=df.index)
+
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(df[target].astype(str).str.strip())
+    return X, y, [str(c) for c in encoder.classes_]
+
+
+def build_pipeline(memory=None, random_state: int = 42, probability: bool = False) -> Pipeline:
+    # only pass probability when asked for: newer scikit-learn deprecates the parameter
+    svc_params = {'probability': True} if probability else {}
+    return Pipeline([
+        ('scaler', StandardScaler()),
+        ('pca', PCA(random_state=random_state)),
+        ('svc', SVC(random_state=random_state, **svc_params)),
+    ], memory=memory)
+
+
+def measure_latency(model, X, repeats: int = 200) -> dict:
+    """
+    Serving latency on the view's code path (one numpy row per request),
+    plus amortised per-row cost when scoring a whole batch.
+    """
+    rows = np.asarray(X, dtype=float)
+    with warnings.catch_warnings():
+        # models fitted on DataFrames warn about missing feature names
+        warnings.simplefilter('ignore', UserWarning)
+        model.predict(rows[:1])  # warm-up
+
+        timings = []
+        for i in range(repeats):
+            row = rows[i % len(rows)].reshape(1, -1)
+            start = time.perf_counter()
+            model.predict(row)
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        model.predict(rows)
+        batch = time.perf_counter() - start
+
+    return {
+        'single_row_ms': float(np.median(timings) * 1000),
+        'single_row_p95_ms': float(np.percentile(timings, 95) * 1000),
+        'batch_ms_per_row': float(batch * 1000 / len(rows)),
+    }
+
+
+def train(dataset_path, output_path, cv: int = 5, n_jobs: int = -1, test_size: float = 0.2,
+          random_state: int = 42, param_grid=None, probability: bool = False, cache_dir=None,
+          verbose: int = 0, baseline_path=None) -> dict:
+    """
+    Run a cross-validated grid search, write the best pipeline to output_path
+    and its metadata alongside it. Returns the metadata dict.
+
+    The new model is benchmarked against baseline_path (default: whatever is
+    already at output_path), normally the model currently being served.
+
+    Scaler/PCA fits are cached on disk (Pipeline memory) so that every C/gamma
+    candidate on the same fold reuses the same preprocessing.
+    """
+    X, y, class_names = load_dataset(dataset_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, stratify=y, random_state=random_state)
+
+    own_cache = cache_dir is None
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix='stress_train_cache_')
+    try:
+        search = GridSearchCV(
+            build_pipeline(memory=cache_dir, random_state=random_state, probability=probability),
+            param_grid or DEFAULT_PARAM_GRID,
+            cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state),
+            scoring='accuracy',
+            n_jobs=n_jobs,
+            refit=True,
+            verbose=verbose,
+        )
+        fit_start = time.perf_counter()
+        search.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_start
+    finally:
+        if own_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    best = search.best_estimator_
+    # the artifact must not point at the (deleted) cache directory
+    best.set_params(memory=None)
+
+    test_accuracy = float(accuracy_score(y_test, best.predict(X_test)))
+    latency = measure_latency(best, X_test)
+
+    previous_latency = None
+    baseline_path = baseline_path or output_path
+    if os.path.exists(baseline_path):
+        try:
+            previous_latency = measure_latency(joblib.load(baseline_path), X_test)
+        except Exception as e:
+            print(f"Could not benchmark current model: {e}")
+
+    metadata = {
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+        'sklearn_version': sklearn.__version__,
+        'dataset': os.path.abspath(str(dataset_path)),
+        'n_samples': int(len(X)),
+        'feature_order': list(FEATURE_ORDER),
+        'dataset_columns': list(DATASET_COLUMNS),
+        'class_map': {i: name for i, name in enumerate(class_names)},
+        'best_params': {k: (v if isinstance(v, (str, int, float)) else str(v))
+                        for k, v in search.best_params_.items()},
+        'cv_folds': cv,
+        'cv_accuracy': float(search.best_score_),
+        'test_accuracy': test_accuracy,
+        'fit_seconds': fit_seconds,
+        'n_jobs': n_jobs,
+        'cpu_count': os.cpu_count(),
+        'latency': latency,
+        'previous_latency': previous_latency,
+    }
+    if previous_latency:
+        metadata['speedup_vs_previous'] = previous_latency['single_row_ms'] / latency['single_row_ms']
+
+    model_tmp = f"{output_path}.tmp"
+    meta_tmp = f"{metadata_path(output_path)}.tmp"
+    joblib.dump(best, model_tmp)
+    with open(meta_tmp, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    _swap_in(model_tmp, meta_tmp, output_path)
+
+    return metadata
+
+
+def _swap_in(model_tmp, meta_tmp, output_path):
+    # metadata goes in before the model, so a running server never loads
+    # a half-written file or a model without its metadata
+    os.replace(meta_tmp, metadata_path(output_path))
+    os.replace(model_tmp, output_path)
+
+
+def promote(candidate_path, serving_path) -> dict:
+    """
+    Replace the served model with a trained candidate (and its metadata).
+    Kept separate from train() so a candidate can be shadow-tested first.
+    """
+    candidate_meta = metadata_path(candidate_path)
+    if not os.path.exists(candidate_path) or not os.path.exists(candidate_meta):
+        raise ValueError(f"No trained candidate with metadata at {candidate_path}")
+
+    model_tmp = f"{serving_path}.tmp"
+    meta_tmp = f"{metadata_path(serving_path)}.tmp"
+    shutil.copyfile(candidate_path, model_tmp)
+    shutil.copyfile(candidate_meta, meta_tmp)
+    _swap_in(model_tmp, meta_tmp, serving_path)
+
+    with open(metadata_path(serving_path)) as f:
+        return json.load(f)
@@ -10,4 +10,10 @@ urlpatterns = [
     path('survey/', views.stress_predictor_view, name='survey'),
     path('chat/', views.chat_page, name='chat'),
     path('api/chat/', views.chat_api, name='chat_api'),
+    path('api/explain/', views.explain_api, name='explain_api'),
+    path('api/shadow/', views.shadow_stats_api, name='shadow_stats_api'),
+    path('cohort/', views.cohort_page, name='cohort'),
+    path('api/jobs/', views.job_upload_api, name='job_upload'),
+    path('api/jobs/<uuid:job_id>/', views.job_status_api, name='job_status'),
+    path('api/jobs/<uuid:job_id>/download/', views.job_download, name='job_download'),
 ]
\ No newline at end of file
@@ -1,8 +1,10 @@
 
 # views.py - ML Model Integration
 
-from django.shortcuts import render
-from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.csrf import csrf_exempt
 import json
 import joblib
@@ -10,8 +12,15 @@ import numpy as np
 from django.conf import settings
 from typing import Tuple
 import os
+import time
 from dotenv import load_dotenv
 import google.generativeai as genai
+from . import jobs
+from .explain import FeatureExplainer
+from .forms import CohortUploadForm
+from .models import ScoringJob
+from .schema import SCHEMA
+from .shadow import ShadowEvaluator
 
 # load .env first
 load_dotenv()   # loads .env in project root
@@ -57,6 +66,29 @@ except Exception as e:
     print(f"Error loading model: {e}")
     model = None
 
+# Explainer shares the loaded model and caches attributions per input vector
+try:
+    explainer = FeatureExplainer(model) if model is not None else None
+except Exception as e:
+    print(f"Error creating explainer: {e}")
+    explainer = None
+
+# Candidate models scored in the background on live traffic (settings.SHADOW_MODELS = {name: path})
+shadow = None
+_shadow_candidates = {}
+for _name, _path in getattr(settings, 'SHADOW_MODELS', {}).items():
+    try:
+        _shadow_candidates[_name] = joblib.load(_path)
+        print(f"Shadow model '{_name}' loaded")
+    except Exception as e:
+        print(f"Error loading shadow model '{_name}': {e}")
+if model is not None and _shadow_candidates:
+    shadow = ShadowEvaluator(
+        _shadow_candidates,
+        max_queue=getattr(settings, 'SHADOW_QUEUE_SIZE', 1000),
+        batch_size=getattr(settings, 'SHADOW_BATCH_SIZE', 64),
+    ).start()
+
 
 # inside views.py (replace your existing stress_predictor_view with the following)
 
@@ -71,40 +103,8 @@ def stress_predictor_view(request):
     # Handle POST (form submit)
     if request.method == 'POST':
         try:
-            # --- Input parsing (keep same order as training features) ---
-            gender = 1 if request.POST.get('gender') == 'Male' else 0
-            age = int(request.POST.get('age') or 0)
-
-            features = [
-                gender,
-                age,
-                int(request.POST.get('stress_life') or 1),
-                int(request.POST.get('heartbeat') or 1),
-                int(request.POST.get('anxiety') or 1),
-                int(request.POST.get('sleep') or 1),
-                int(request.POST.get('concentration_general') or 1),
-                int(request.POST.get('headaches') or 1),
-                int(request.POST.get('irritation') or 1),
-                int(request.POST.get('concentration_academic') or 1),
-                int(request.POST.get('sadness') or 1),
-                int(request.POST.get('illness') or 1),
-                int(request.POST.get('lonely') or 1),
-                int(request.POST.get('workload') or 1),
-                int(request.POST.get('competition') or 1),
-                int(request.POST.get('relationship') or 1),
-                int(request.POST.get('professor_difficulty') or 1),
-                int(request.POST.get('work_environment') or 1),
-                int(request.POST.get('relaxation_time') or 1),
-                int(request.POST.get('home_environment') or 1),
-                int(request.POST.get('confidence_performance') or 1),
-                int(request.POST.get('confidence_subjects') or 1),
-                int(request.POST.get('activities_conflict') or 1),
-                int(request.POST.get('class_attendance') or 5),
-                int(request.POST.get('weight_change') or 1)
-            ]
-
-            # Convert to numpy array for model
-            features_array = np.array(features).reshape(1, -1)
+            # --- Input parsing (column order, defaults and encodings come from the shared schema) ---
+            features_array = SCHEMA.parse_post(request.POST)
 
             if model is None:
                 # Model not loaded
@@ -115,10 +115,16 @@ def stress_predictor_view(request):
                 return render(request, 'predictor/survey.html', context)
 
             # --- Prediction ---
+            predict_start = time.perf_counter()
             prediction_raw = model.predict(features_array)
+            predict_seconds = time.perf_counter() - predict_start
             # sometimes predict returns array, sometimes single value
             prediction = int(prediction_raw[0]) if hasattr(prediction_raw, '__iter__') else int(prediction_raw)
 
+            # Hand the same row to the shadow worker (non-blocking, dropped if the queue is full)
+            if shadow is not None:
+                shadow.submit(features_array, prediction, predict_seconds)
+
             # Try to get probability / confidence
             confidence = None
             try:
@@ -175,6 +181,14 @@ def stress_predictor_view(request):
 
             recs = recommendations_map.get(stress_result['class'], [])
 
+            # Top questions behind this prediction (one batched model call, cached)
+            top_factors = []
+            if explainer is not None:
+                try:
+                    top_factors = explainer.explain(features_array)[0]
+                except Exception as e:
+                    print("ERROR explaining prediction:", e)
+
             # Build context to send to template
             context.update({
                 'result': True,
@@ -184,11 +198,12 @@ def stress_predictor_view(request):
                 'stress_class': stress_result['class'],
                 'icon': stress_result['icon'],
                 'confidence': confidence,
-                'recommendations': recs
+                'recommendations': recs,
+                'top_factors': top_factors
             })
 
             # Optional: print debug info to server console (check runserver logs)
-            print("DEBUG: features =", features)
+            print("DEBUG: features =", features_array[0].tolist())
             print("DEBUG: prediction =", prediction, "confidence =", confidence)
 
             return render(request, 'predictor/survey.html', context)
@@ -323,6 +338,117 @@ def chat_api(request):
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+def _parse_survey(survey):
+    if isinstance(survey, dict):
+        return SCHEMA.parse_dict(survey)
+    if np.ndim(survey) != 1:
+        # nested lists would expand one survey into many rows past EXPLAIN_MAX_BATCH
+        raise ValueError("Each survey must be a flat list of feature values or an object")
+    return SCHEMA.validate(survey)
+
+@csrf_exempt
+def explain_api(request):
+    """
+    Batch explanation endpoint.
+    Expects JSON {"surveys": [[25 values in feature order] or {feature: value}, ...], "top_k": 5}
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    if model is None or explainer is None:
+        return JsonResponse({'success': False, 'error': 'ML model not loaded.'}, status=503)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        surveys = data.get('surveys') or []
+        if not isinstance(surveys, list) or not surveys:
+            raise ValueError("'surveys' must be a non-empty list")
+        top_k = int(data.get('top_k', 5))
+        if not 1 <= top_k <= SCHEMA.size:
+            raise ValueError(f"'top_k' must be between 1 and {SCHEMA.size}")
+    except (ValueError, TypeError) as e:
+        # json.JSONDecodeError is a ValueError
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    max_batch = getattr(settings, 'EXPLAIN_MAX_BATCH', 100)
+    if len(surveys) > max_batch:
+        return JsonResponse({
+            'success': False,
+            'error': f"At most {max_batch} surveys per request, got {len(surveys)}."
+        }, status=413)
+
+    try:
+        # each survey is either one flat feature list in schema order or a dict keyed by feature name
+        surveys = np.vstack([_parse_survey(survey) for survey in surveys])
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    predictions = model.predict(surveys)
+    explanations = explainer.explain(surveys, top_k=top_k)
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {'prediction': int(pred), 'top_factors': factors}
+            for pred, factors in zip(predictions, explanations)
+        ]
+    })
+
+def shadow_stats_api(request):
+    """Agreement, class drift and latency of shadow models vs the primary model"""
+    if shadow is None:
+        return JsonResponse({'enabled': False})
+    return JsonResponse({'enabled': True, **shadow.snapshot()})
+
+def cohort_page(request):
+    """Upload page for scoring a whole class's survey export"""
+    jobs.ensure_started()
+    return render(request, 'predictor/cohort.html', {'form': CohortUploadForm()})
+
+
+def _job_status(job):
+    data = {
+        'job_id': str(job.id),
+        'file': job.original_name,
+        'status': job.status,
+        'rows_done': job.rows_done,
+        'rows_total': job.rows_total,
+        'progress': round(job.progress, 1),
+        'status_url': reverse('predictor:job_status', args=[job.id]),
+    }
+    if job.status == ScoringJob.DONE:
+        data['download_url'] = reverse('predictor:job_download', args=[job.id])
+    if job.status == ScoringJob.FAILED:
+        data['error'] = job.error
+    return data
+
+
+@require_POST
+def job_upload_api(request):
+    """Store an uploaded CSV and queue it for background scoring"""
+    form = CohortUploadForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+    job = jobs.create_job(form.cleaned_data['file'])
+    jobs.enqueue(job)
+    return JsonResponse({'success': True, **_job_status(job)}, status=202)
+
+
+@require_GET
+def job_status_api(request, job_id):
+    job = jobs.check_job(get_object_or_404(ScoringJob, pk=job_id))
+    return JsonResponse(_job_status(job))
+
+
+@require_GET
+def job_download(request, job_id):
+    job = get_object_or_404(ScoringJob, pk=job_id)
+    if job.status != ScoringJob.DONE or not os.path.exists(job.result_path):
+        raise Http404("Result not ready")
+    name = os.path.splitext(job.original_name)[0] + '_scored.csv'
+    return FileResponse(open(job.result_path, 'rb'), as_attachment=True, filename=name,
+                        content_type='text/csv')
+
 #def get_chatbot_response(user_message, stress_type=None):
     """
     Personalized chatbot responses based on stress type
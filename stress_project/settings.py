@@ -26,6 +26,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'predictor.middleware.AdmissionControlMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -35,6 +36,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'stress_project.urls' 
 
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -55,4 +63,30 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'predictor' / 'static',
 ]
-STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
\ No newline at end of file
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Shadow evaluation: candidate models scored off the request path, e.g.
+# SHADOW_MODELS = {'retrained': BASE_DIR / 'predictor' / 'ml_model' / 'candidate.joblib'}
+SHADOW_MODELS = {}
+SHADOW_QUEUE_SIZE = 1000
+SHADOW_BATCH_SIZE = 64
+
+# Admission control (predictor.middleware). Merged over middleware.DEFAULT_RATE_LIMITS
+# (survey, chat, explain); rate = requests/second refilled, burst = bucket size
+RATE_LIMITS = {
+    'jobs': {'path': '/api/jobs/', 'methods': ['POST'], 'rate': 0.05, 'burst': 3},
+}
+UPSTREAM_MAX_CONCURRENCY = 8   # concurrent Gemini calls per server process (not shared between workers)
+RATE_LIMIT_CACHE = None        # set to a CACHES alias to share counters between workers
+RATE_LIMIT_IP_FACTOR = 30      # everyone behind one IP (e.g. a school NAT) shares a bucket this many times larger
+RATE_LIMIT_PROXY_COUNT = 0     # reverse proxies in front of the app that append to X-Forwarded-For
+
+# Largest batch accepted by api/explain/ (each survey costs 25 perturbed model rows)
+EXPLAIN_MAX_BATCH = 100
+
+# Cohort scoring jobs (predictor.jobs)
+COHORT_JOBS_DIR = BASE_DIR / 'cohort_jobs'   # uploaded and scored files
+COHORT_JOB_BROKER = 'inprocess'              # or 'db': leave jobs queued for `manage.py run_cohort_worker`
+COHORT_JOB_WORKERS = 1                       # concurrent bulk jobs, kept low so survey traffic isn't starved
+COHORT_CHUNK_SIZE = 2000                     # rows scored per model call
+COHORT_MAX_UPLOAD_MB = 20